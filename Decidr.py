@@ -1,8 +1,19 @@
 import streamlit as st
-import requests
+import httpx
 import json
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    import orjson  # optional: faster payload serialization
+except ImportError:
+    orjson = None
+
 # Configure page
 st.set_page_config(
     page_title="Decidr - AI Decision Assistant",
@@ -13,9 +24,195 @@ st.set_page_config(
 
 # API Configuration
 API_URL = "https://router.huggingface.co/v1/chat/completions"
+DEFAULT_MODEL = "Qwen/Qwen3-VL-8B-Instruct:novita"
+_PAYLOAD_BASE = {
+    "model": DEFAULT_MODEL,
+    "max_tokens": 500,  # upper bound; send_turn scales it down for short messages
+    "temperature": 0.7,
+    "stream": True
+}
+CACHE_MAX_ENTRIES = 256
+FRAGMENT_CACHE_MAX_ENTRIES = 1024
+MIN_REPLY_TOKENS = 200
+SUMMARY_MAX_TOKENS = 250
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_MAX_ENTRIES = 128
+SEMANTIC_THRESHOLD = 0.92  # cosine similarity above which a paraphrase reuses a reply
+FOLLOWUP_PROMPTS = [
+    "What are the main pros and cons?",
+    "What would you decide and why?",
+]
+PREFETCH_PER_TURN = 2  # token budget guard for speculative follow-up replies
+PREFETCH_WORKERS = 2
+PREFETCH_MAX_IN_FLIGHT = 4  # across all sessions; further prefetches are skipped, not queued
+MAX_INPUT_CHARS = 4096  # enforced by the input widgets; send_turn re-checks
+DECISION_PREFIX = "I need help deciding: "
+# Small talk answered without calling the model; "yes"/"no"/"ok" are left out because
+# they usually answer the assistant's clarifying question and need the model
+CANNED_REPLIES = {
+    "hi": "Hi! What decision are you working through? Describe it here or in the sidebar and we'll think it through together.",
+    "hello": "Hello! What decision are you working through? Describe it here or in the sidebar and we'll think it through together.",
+    "hey": "Hey! What decision are you working through? Describe it here or in the sidebar and we'll think it through together.",
+    "thanks": "You're welcome! Let me know if you'd like to dig into any of your options further.",
+    "thank you": "You're welcome! Let me know if you'd like to dig into any of your options further.",
+}
+MAX_TURNS = 12  # messages sent verbatim; older ones are folded into a summary
+VISIBLE_MESSAGES = 20  # history rendered as chat bubbles; older messages collapse into an expander
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 2
+POLL_INTERVAL = 0.3  # seconds between reruns while a background reply is pending
+
+# Conversation history is stored as plain (role, content) tuples: compact, and unlike a class
+# defined here they still pickle after a rerun re-executes this module. Roles are interned so
+# comparisons are pointer checks
+USER = sys.intern("user")
+ASSISTANT = sys.intern("assistant")
+
+class LLMCache:
+    """Exact-match LRU cache of completed AI replies"""
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Shared by every session's script thread
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+@st.cache_resource
+def _get_cache():
+    """Shared response cache, kept across reruns and sessions"""
+    return LLMCache()
+
+def _dumps(obj):
+    """Serialize to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+@st.cache_resource
+def _message_fragments():
+    """Serialized messages keyed by (role, content), shared across reruns"""
+    return {}
+
+def _encode_message(message):
+    """JSON bytes for one chat message, encoded only the first time it is sent"""
+    # Session-state strings are the same objects turn to turn, so their hashes are already cached
+    key = (message["role"], message["content"])
+    fragments = _message_fragments()
+    fragment = fragments.get(key)
+    if fragment is None:
+        fragment = _dumps(message)
+        if len(fragments) >= FRAGMENT_CACHE_MAX_ENTRIES:
+            fragments.clear()
+        fragments[key] = fragment
+    return fragment
+
+def _encode_messages(messages):
+    """JSON array bytes for a message list, assembled from cached fragments"""
+    return b"[" + b",".join(_encode_message(message) for message in messages) + b"]"
+
+def _encode_payload(payload):
+    """Serialize a request body; only messages not seen before are encoded"""
+    head = _dumps({field: value for field, value in payload.items() if field != "messages"})
+    return head[:-1] + b',"messages":' + _encode_messages(payload["messages"]) + b"}"
+
+class SemanticCache:
+    """Per-session replies keyed by question embedding, matched only within the same conversation scope"""
+    # No lock, so it stays picklable in session state; deque appends and list() snapshots
+    # are atomic, which is all the prefetch workers and the script thread need
+    def __init__(self, max_entries=SEMANTIC_CACHE_MAX_ENTRIES, threshold=SEMANTIC_THRESHOLD):
+        self.threshold = threshold
+        self.entries = deque(maxlen=max_entries)  # (scope, embedding, reply), oldest evicted first
+        self.hits = 0
+    
+    def lookup(self, scope, embedding):
+        best_reply, best_similarity = None, self.threshold
+        for entry_scope, cached, reply in list(self.entries):
+            if entry_scope != scope:
+                continue
+            # Embeddings are L2-normalized, so the dot product is the cosine similarity
+            similarity = float(cached @ embedding)
+            if similarity >= best_similarity:
+                best_reply, best_similarity = reply, similarity
+        if best_reply is not None:
+            self.hits += 1
+        return best_reply
+    
+    def add(self, scope, embedding, reply):
+        self.entries.append((scope, embedding, reply))
+
+@st.cache_resource(show_spinner="Loading the semantic cache model...")
+def _embedder():
+    """Small local sentence-embedding model, or None when it can't be loaded"""
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL)
+    except Exception:
+        # Not installed, or the model download failed (offline, hub error);
+        # the semantic cache is an optimization, so turns go straight to the API
+        return None
+
+def embed_text(text):
+    """Normalized embedding of `text`, or None when the semantic cache is unavailable"""
+    embedder = _embedder()
+    if embedder is None:
+        return None
+    return embedder.encode(text, normalize_embeddings=True)
+
+@st.cache_resource(show_spinner=False)
+def _followup_embeddings():
+    """Embeddings of the constant FOLLOWUP_PROMPTS, computed once"""
+    return [embed_text(question) for question in FOLLOWUP_PROMPTS]
+
+def conversation_scope(ai_messages):
+    """Hash of everything sent before the latest user message"""
+    return hashlib.sha256(_encode_messages(ai_messages[:-1])).hexdigest()
+
+@st.cache_resource
+def _client():
+    """Shared HTTP client; pooled connections are reused and multiplexed over HTTP/2"""
+    limits = httpx.Limits(max_keepalive_connections=4, max_connections=8)
+    try:
+        transport = httpx.HTTPTransport(http2=True, limits=limits, retries=MAX_RETRIES)
+    except ImportError:
+        # HTTP/2 needs the h2 package (pip install "httpx[http2]"); fall back to HTTP/1.1
+        transport = httpx.HTTPTransport(limits=limits, retries=MAX_RETRIES)
+    return httpx.Client(transport=transport, timeout=httpx.Timeout(60.0, connect=5.0))
 
+@st.cache_resource
+def _executor():
+    """Worker threads for AI calls that shouldn't block the script thread"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="decidr")
+
+@st.cache_resource
+def _prefetch_executor():
+    """Separate, smaller pool so speculative calls never delay a user-visible reply"""
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="decidr-prefetch")
+
+@st.cache_resource
+def _prefetch_slots():
+    """Caps queued plus running prefetches shared by every session"""
+    return threading.BoundedSemaphore(PREFETCH_MAX_IN_FLIGHT)
+
+@st.cache_data(show_spinner=False)
 def get_headers():
-    """Get headers for API requests"""
+    """Get headers for API requests (cached; call get_headers.clear() after rotating the token)"""
     try:
         hf_token = st.secrets["HF_TOKEN"]
     except KeyError:
@@ -28,27 +225,99 @@ def get_headers():
         "Content-Type": "application/json"
     }
 
-def query_ai(messages, model="Qwen/Qwen3-VL-8B-Instruct:novita"):
-    """accounts/fireworks/models/llama-v3p1-8b-instruct"""
-    """Query the AI model with conversation history"""
-    payload = {
-        "messages": messages,
-        "model": model,
-        "max_tokens": 500,
-        "temperature": 0.7,
-        "stream": False
-    }
+def query_ai(messages, model=DEFAULT_MODEL, headers=None, max_tokens=None, outcome=None):
+    """Stream the AI model's reply to the conversation history, yielding text deltas.
+
+    If `outcome` is a dict, it is given "complete" (the stream reached its end),
+    "finish_reason" ("length" means the reply was cut off at max_tokens) and "error".
+    """
+    if outcome is None:
+        outcome = {}
+    outcome["complete"] = False
+    outcome["finish_reason"] = None
+    outcome["error"] = None
+    
+    payload = {**_PAYLOAD_BASE, "model": model, "messages": messages}
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
     
+    # Repeated prompts (example buttons, reruns) are answered from the cache;
+    # the body holds every field that determines the completion, so it doubles as the key
+    body = _encode_payload(payload)
+    cache = _get_cache()
+    key = hashlib.sha256(body).hexdigest()
+    cached = cache.get(key)
+    if cached is not None:
+        reply, finish_reason = cached
+        outcome["complete"] = True
+        outcome["finish_reason"] = finish_reason
+        yield reply
+        return
+    
+    parts = []
+    finished = False
+    finish_reason = None
     try:
-        response = requests.post(API_URL, headers=get_headers(), json=payload)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"API request failed: {str(e)}")
-        return None
-    except json.JSONDecodeError as e:
-        st.error(f"Failed to parse API response: {str(e)}")
-        return None
+        for attempt in range(MAX_RETRIES + 1):
+            with _client().stream("POST", API_URL, headers=headers or get_headers(), content=body) as response:
+                # The transport only retries failed connections; back off on overload responses here
+                if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    time.sleep(0.3 * 2 ** attempt)
+                    continue
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    # Server-sent events: skip keep-alives and comments, stop at the sentinel
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        finished = True
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        # Skip a malformed event rather than dropping the whole reply
+                        continue
+                    choices = chunk.get("choices") if isinstance(chunk, dict) else None
+                    if not choices or not isinstance(choices[0], dict):
+                        continue
+                    choice = choices[0]
+                    if choice.get("finish_reason"):
+                        finished = True
+                        finish_reason = choice["finish_reason"]
+                    delta = (choice.get("delta") or {}).get("content") or ""
+                    parts.append(delta)
+                    yield delta
+            break
+    except httpx.HTTPError as e:
+        # st.error does nothing on a worker thread, so the reason is also kept for the caller
+        outcome["error"] = f"API request failed: {str(e)}"
+        st.error(outcome["error"])
+    else:
+        # Only complete replies are cached
+        if parts and finished:
+            cache.put(key, ("".join(parts), finish_reason))
+            outcome["complete"] = True
+            outcome["finish_reason"] = finish_reason
+
+def remember_reply(semantic_cache, scope, embedding, reply, outcome):
+    """Store a reply in the semantic cache under its question's embedding"""
+    # Paraphrases may ask with any max_tokens budget, so only store replies that
+    # finished on their own: not failed mid-stream and not cut off at the budget
+    if semantic_cache is None or embedding is None or not reply or not outcome.get("complete"):
+        return
+    if outcome.get("finish_reason") == "length":
+        return
+    semantic_cache.add(scope, embedding, reply)
+
+def _collect_reply(messages, headers, semantic_cache=None, scope=None, embedding=None, max_tokens=None):
+    """Run query_ai to completion on a worker thread and return the full reply"""
+    outcome = {}
+    reply = "".join(query_ai(messages, headers=headers, max_tokens=max_tokens, outcome=outcome))
+    remember_reply(semantic_cache, scope, embedding, reply, outcome)
+    if not reply and outcome.get("error"):
+        raise RuntimeError(outcome["error"])
+    return reply
 
 def initialize_session_state():
     """Initialize session state variables"""
@@ -56,12 +325,38 @@ def initialize_session_state():
         st.session_state.messages = []
     if "decision_context" not in st.session_state:
         st.session_state.decision_context = ""
+    if "decision_context_input" not in st.session_state:
+        st.session_state.decision_context_input = st.session_state.decision_context
     if "current_decision" not in st.session_state:
         st.session_state.current_decision = ""
+    if "summary" not in st.session_state:
+        st.session_state.summary = ""
+    if "summarized_upto" not in st.session_state:
+        st.session_state.summarized_upto = 0
+    if "pending_future" not in st.session_state:
+        st.session_state.pending_future = None
+    if "sem_cache" not in st.session_state:
+        # Per session: replies can quote what the user typed, so they are never shared
+        st.session_state.sem_cache = SemanticCache()
+    if "older_md" not in st.session_state:
+        st.session_state.older_md = ""
+        st.session_state.older_md_count = 0
 
-def create_system_prompt(decision_context=""):
-    """Create a system prompt for decision-making assistance"""
-    base_prompt = """You are Decidr, an expert decision-making assistant. Your role is to help users make thoughtful, well-informed decisions by:
+def _apply_decision_context():
+    """Text area callback: copy the committed input into the decision context"""
+    st.session_state.decision_context = st.session_state.decision_context_input
+
+def reset_conversation():
+    """Clear the conversation and its running summary"""
+    st.session_state.messages = []
+    st.session_state.summary = ""
+    st.session_state.summarized_upto = 0
+    st.session_state.older_md = ""
+    st.session_state.older_md_count = 0
+    # An in-flight reply belongs to the old conversation; let it finish unobserved
+    st.session_state.pending_future = None
+
+BASE_PROMPT = """You are Decidr, an expert decision-making assistant. Your role is to help users make thoughtful, well-informed decisions by:
 
 1. Asking clarifying questions to understand the situation fully
 2. Helping identify pros and cons
@@ -71,10 +366,203 @@ def create_system_prompt(decision_context=""):
 
 Be conversational, empathetic, and practical. Ask one question at a time to avoid overwhelming the user. Help them think through their decision systematically."""
 
+def create_system_prompt(decision_context=""):
+    """Create a system prompt for decision-making assistance"""
+    # The static instructions always lead, so the prompt prefix stays byte-identical
+    # across turns and contexts and the provider's prefix cache can reuse it
     if decision_context:
-        base_prompt += f"\n\nCurrent decision context: {decision_context}"
+        return BASE_PROMPT + f"\n\nCurrent decision context: {decision_context}"
+    
+    return BASE_PROMPT
+
+SUMMARY_PROMPT = """Summarize the conversation below between a user and Decidr, a decision-making assistant, in at most 120 words. Keep the decision being made, the options considered, the user's priorities and constraints, and any conclusions reached."""
+
+def update_summary(upto):
+    """Fold messages before index `upto` into the running conversation summary"""
+    start = st.session_state.summarized_upto
+    transcript = "\n\n".join(
+        f"{role}: {content}" for role, content in st.session_state.messages[start:upto]
+    )
+    if st.session_state.summary:
+        transcript = f"Summary so far: {st.session_state.summary}\n\n{transcript}"
+    
+    with st.spinner("Summarizing earlier conversation..."):
+        summary = "".join(query_ai([
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript}
+        ], max_tokens=SUMMARY_MAX_TOKENS))
+    # On failure keep sending the unsummarized history rather than losing it
+    if summary:
+        st.session_state.summary = summary
+        st.session_state.summarized_upto = upto
+
+def build_ai_messages(decision_context):
+    """Prepare messages for AI: system prompt, summary of older turns, then recent history"""
+    messages = st.session_state.messages
+    if len(messages) - st.session_state.summarized_upto > MAX_TURNS:
+        # Summarize in batches so a summary call happens every few turns, not every turn
+        update_summary(len(messages) - MAX_TURNS // 2)
     
-    return base_prompt
+    ai_messages = [{"role": "system", "content": create_system_prompt(decision_context)}]
+    if st.session_state.summary:
+        ai_messages.append({"role": "system", "content": f"Prior conversation summary: {st.session_state.summary}"})
+    ai_messages.extend(
+        {"role": role, "content": content} for role, content in messages[st.session_state.summarized_upto:]
+    )
+    return ai_messages
+
+ROLE_LABELS = {USER: "You", ASSISTANT: "Decidr"}
+
+def older_history_markdown(older):
+    """Markdown for the collapsed history, extended incrementally as messages scroll out of view"""
+    if st.session_state.older_md_count > len(older):
+        st.session_state.older_md = ""
+        st.session_state.older_md_count = 0
+    
+    new = older[st.session_state.older_md_count:]
+    if new:
+        parts = [f"**{ROLE_LABELS[role]}:** {content}" for role, content in new]
+        if st.session_state.older_md:
+            parts.insert(0, st.session_state.older_md)
+        st.session_state.older_md = "\n\n---\n\n".join(parts)
+        st.session_state.older_md_count = len(older)
+    return st.session_state.older_md
+
+def reply_token_budget(user_content):
+    """Scale the reply's max_tokens with the length of the user's message"""
+    # Roughly 1.3 tokens per word; generation time grows with the budget the provider reserves
+    estimated_tokens = len(user_content.split()) * 1.3
+    return int(min(_PAYLOAD_BASE["max_tokens"], MIN_REPLY_TOKENS + 4 * estimated_tokens))
+
+def send_turn(user_content, background=False):
+    """Add a user message, get the AI's reply to the conversation and record it"""
+    # Reject inputs that shouldn't reach the model at all
+    if not user_content.strip():
+        return None
+    if len(user_content) > MAX_INPUT_CHARS:
+        st.warning(f"That message is too long. Please keep it under {MAX_INPUT_CHARS} characters.")
+        return None
+    
+    st.session_state.messages.append((USER, user_content))
+    
+    # Display user message before anything slow, such as folding history into the summary
+    if not background:
+        with st.chat_message("user"):
+            st.markdown(user_content)
+    
+    # Small talk gets a canned reply without a round trip
+    canned = CANNED_REPLIES.get(user_content.strip().lower().rstrip("!.?"))
+    if canned:
+        st.session_state.messages.append((ASSISTANT, canned))
+        if not background:
+            with st.chat_message("assistant"):
+                st.markdown(canned)
+        return canned
+    
+    # Both entry points build the same system prefix, so it is byte-identical turn to turn
+    ai_messages = build_ai_messages(st.session_state.decision_context)
+    
+    # A paraphrase of a question already answered at this point of the conversation reuses that reply
+    scope = conversation_scope(ai_messages)
+    embedding = embed_text(user_content)
+    semantic_cache = st.session_state.sem_cache
+    cached = semantic_cache.lookup(scope, embedding) if embedding is not None else None
+    
+    # The opening turn lays out the whole decision and usually gets the longest answer
+    if len(st.session_state.messages) == 1:
+        max_tokens = _PAYLOAD_BASE["max_tokens"]
+    else:
+        max_tokens = reply_token_budget(user_content)
+    
+    if background:
+        if cached:
+            st.session_state.messages.append((ASSISTANT, cached))
+            prefetch_followups()
+            return cached
+        st.session_state.pending_future = _executor().submit(
+            _collect_reply, ai_messages, get_headers(), semantic_cache, scope, embedding, max_tokens
+        )
+        return None
+    
+    # Stream AI response
+    with st.chat_message("assistant"):
+        if cached:
+            st.markdown(cached)
+            ai_message = cached
+        else:
+            outcome = {}
+            ai_message = st.write_stream(query_ai(ai_messages, max_tokens=max_tokens, outcome=outcome))
+            remember_reply(semantic_cache, scope, embedding, ai_message, outcome)
+            if ai_message and outcome.get("finish_reason") == "length":
+                st.caption("This reply hit the length limit and may be cut off. Ask me to continue.")
+        
+        if ai_message:
+            # Add AI response to conversation
+            st.session_state.messages.append((ASSISTANT, ai_message))
+            prefetch_followups()
+        else:
+            st.error("Sorry, I couldn't get a response. Please try again.")
+    return ai_message
+
+def prefetch_followups():
+    """Answer likely follow-up questions in the background while the user reads the reply"""
+    # Replies land in the exact-match cache, where the follow-up buttons find them, and in the
+    # session's semantic cache when embeddings are available.
+    # The next turn will fold history into the summary first, so neither key could match
+    if len(st.session_state.messages) + 1 - st.session_state.summarized_upto > MAX_TURNS:
+        return
+    
+    history = build_ai_messages(st.session_state.decision_context)
+    headers = get_headers()
+    slots = _prefetch_slots()
+    prompts = list(zip(FOLLOWUP_PROMPTS, _followup_embeddings()))
+    for question, embedding in prompts[:PREFETCH_PER_TURN]:
+        # Skip rather than queue when other sessions' speculation already fills the pool
+        if not slots.acquire(blocking=False):
+            return
+        # Same messages and budget send_turn would use, so the request body is byte-identical
+        ai_messages = history + [{"role": "user", "content": question}]
+        future = _prefetch_executor().submit(
+            _collect_reply, ai_messages, headers,
+            st.session_state.sem_cache, conversation_scope(ai_messages), embedding,
+            reply_token_budget(question)
+        )
+        future.add_done_callback(lambda _: slots.release())
+
+# Static page copy, kept out of main() so the layout code stays readable
+_TIPS_MD = """
+**Good decisions often involve:**
+- Clearly defining the problem
+- Identifying your values and priorities
+- Considering multiple options
+- Weighing pros and cons
+- Thinking about long-term consequences
+- Getting input from trusted sources
+- Setting a decision deadline
+"""
+
+_GET_STARTED_MD = """### 🚀 Get Started
+To begin, either:
+1. **Describe your decision** in the sidebar and click 'Start New Decision'
+2. **Ask a question** directly in the chat below
+"""
+
+EXAMPLE_SCENARIOS = [
+    ("🏠 Moving Decision", "I'm trying to decide whether to move to a new city for a job opportunity. Can you help me think through this decision?"),
+    ("🎓 Education Choice", "I'm having trouble choosing between different college majors. How should I approach this decision?"),
+    ("💼 Career Change", "I'm considering changing careers but I'm not sure if it's the right move. Can you help me evaluate this?"),
+]
+
+def _queue_prompt(prompt):
+    """Button callback: queue a prompt for send_turn in the upcoming run"""
+    st.session_state.pending_prompt = prompt
+
+_FOOTER_MD = (
+    "<div style='text-align: center; color: #666;'>"
+    "Decidr helps you make better decisions through AI-powered conversation. "
+    "Remember, the final decision is always yours! 🎯"
+    "</div>"
+)
 
 def main():
     initialize_session_state()
@@ -88,131 +576,128 @@ def main():
         st.header("Decision Setup")
         
         # Decision context input
-        decision_context = st.text_area(
+        st.text_area(
             "What decision are you trying to make?",
-            value=st.session_state.decision_context,
+            key="decision_context_input",
             placeholder="e.g., Should I change careers? Which apartment should I rent? What should I study in college?",
-            height=100
+            height=100,
+            # Leaves room for the prefix, so the first turn is never rejected behind the rerun
+            max_chars=MAX_INPUT_CHARS - len(DECISION_PREFIX),
+            on_change=_apply_decision_context
         )
-        
-        if decision_context != st.session_state.decision_context:
-            st.session_state.decision_context = decision_context
+        decision_context = st.session_state.decision_context
         
         # Start new decision button
         if st.button("🔄 Start New Decision", type="primary"):
-            st.session_state.messages = []
+            reset_conversation()
             st.session_state.current_decision = decision_context
             if decision_context:
-                # Add initial system message
-                initial_messages = [
-                    {"role": "system", "content": create_system_prompt(decision_context)},
-                    {"role": "user", "content": f"I need help deciding: {decision_context}"}
-                ]
-                
-                # Get AI's initial response
-                with st.spinner("Getting AI response..."):
-                    response = query_ai(initial_messages)
-                    if response and "choices" in response:
-                        ai_message = response["choices"][0]["message"]["content"]
-                        st.session_state.messages = [
-                            {"role": "user", "content": f"I need help deciding: {decision_context}"},
-                            {"role": "assistant", "content": ai_message}
-                        ]
+                # Fetch AI's initial response in the background; the chat shows a placeholder meanwhile
+                send_turn(DECISION_PREFIX + decision_context, background=True)
             st.rerun()
         
         # Clear conversation button
         if st.button("🗑️ Clear Conversation"):
-            st.session_state.messages = []
+            reset_conversation()
             st.rerun()
         
         # Decision-making tips
         st.markdown("---")
         st.header("💡 Decision Tips")
-        st.markdown("""
-        **Good decisions often involve:**
-        - Clearly defining the problem
-        - Identifying your values and priorities
-        - Considering multiple options
-        - Weighing pros and cons
-        - Thinking about long-term consequences
-        - Getting input from trusted sources
-        - Setting a decision deadline
-        """)
+        st.markdown(_TIPS_MD)
+        
+        # Response cache stats
+        cache = _get_cache()
+        st.caption(f"Response cache: {cache.hits} hits · {cache.misses} misses · {len(cache.entries)} entries")
+        # Read the session's cache directly; asking for the embedder here would load the model on page view
+        semantic_cache = st.session_state.sem_cache
+        if semantic_cache.entries:
+            st.caption(f"Semantic cache: {semantic_cache.hits} hits · {len(semantic_cache.entries)} entries")
     
     # Main chat interface
     st.markdown("---")
     
-    # Display conversation history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display conversation history: older messages as one collapsed block, recent ones as bubbles
+    older = st.session_state.messages[:-VISIBLE_MESSAGES]
+    if older:
+        with st.expander(f"Earlier ({len(older)} messages)"):
+            st.markdown(older_history_markdown(older))
     
-    # Chat input
-    if prompt := st.chat_input("Ask for help with your decision..."):
-        # Add user message to conversation
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        
-        # Display user message
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        
-        # Prepare messages for AI (include system prompt)
-        ai_messages = [{"role": "system", "content": create_system_prompt(st.session_state.decision_context)}]
-        ai_messages.extend(st.session_state.messages)
-        
-        # Get AI response
+    for role, content in st.session_state.messages[-VISIBLE_MESSAGES:]:
+        with st.chat_message(role):
+            st.markdown(content)
+    
+    # Background reply: show it once ready, otherwise a placeholder
+    pending = st.session_state.pending_future
+    if pending is not None:
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = query_ai(ai_messages)
-                
-                if response and "choices" in response:
-                    ai_message = response["choices"][0]["message"]["content"]
+            if pending.done():
+                st.session_state.pending_future = None
+                try:
+                    ai_message = pending.result()
+                    failure = "Please try again."
+                except Exception as e:
+                    # Worker failures can only be reported here, on the script thread
+                    ai_message = None
+                    failure = str(e)
+                if ai_message:
                     st.markdown(ai_message)
-                    
-                    # Add AI response to conversation
-                    st.session_state.messages.append({"role": "assistant", "content": ai_message})
+                    st.session_state.messages.append((ASSISTANT, ai_message))
+                    prefetch_followups()
                 else:
-                    st.error("Sorry, I couldn't get a response. Please try again.")
-    
-    # Show helpful prompts if conversation is empty
-    if not st.session_state.messages:
-        st.markdown("### 🚀 Get Started")
-        st.markdown("To begin, either:")
-        st.markdown("1. **Describe your decision** in the sidebar and click 'Start New Decision'")
-        st.markdown("2. **Ask a question** directly in the chat below")
-        
-        # Example decision scenarios
-        st.markdown("### 📝 Example Decision Scenarios")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("🏠 Moving Decision", use_container_width=True):
-                example_prompt = "I'm trying to decide whether to move to a new city for a job opportunity. Can you help me think through this decision?"
-                st.session_state.messages.append({"role": "user", "content": example_prompt})
-                st.rerun()
-        
-        with col2:
-            if st.button("🎓 Education Choice", use_container_width=True):
-                example_prompt = "I'm having trouble choosing between different college majors. How should I approach this decision?"
-                st.session_state.messages.append({"role": "user", "content": example_prompt})
-                st.rerun()
-        
-        with col3:
-            if st.button("💼 Career Change", use_container_width=True):
-                example_prompt = "I'm considering changing careers but I'm not sure if it's the right move. Can you help me evaluate this?"
-                st.session_state.messages.append({"role": "user", "content": example_prompt})
-                st.rerun()
+                    st.error(f"Sorry, I couldn't get a response. {failure}")
+            else:
+                st.markdown("_Thinking..._")
+    
+    # Chat input, or an example prompt queued by its button
+    prompt = st.chat_input(
+        "Ask for help with your decision...",
+        max_chars=MAX_INPUT_CHARS,
+        disabled=st.session_state.pending_future is not None
+    ) or st.session_state.pop("pending_prompt", None)
+    if prompt:
+        send_turn(prompt)
+    
+    # Follow-up suggestions under the latest reply; their answers are usually prefetched already
+    messages = st.session_state.messages
+    if messages and messages[-1][0] == ASSISTANT and st.session_state.pending_future is None:
+        for index, (column, question) in enumerate(zip(st.columns(len(FOLLOWUP_PROMPTS)), FOLLOWUP_PROMPTS)):
+            with column:
+                st.button(
+                    question,
+                    key=f"followup_{index}",
+                    use_container_width=True,
+                    on_click=_queue_prompt,
+                    args=(question,)
+                )
+    
+    # Show helpful prompts if conversation is empty and no reply is in flight
+    if not st.session_state.messages and st.session_state.pending_future is None:
+        with st.container():
+            st.markdown(_GET_STARTED_MD)
+            
+            # Example decision scenarios
+            st.markdown("### 📝 Example Decision Scenarios")
+            
+            for column, (label, example_prompt) in zip(st.columns(len(EXAMPLE_SCENARIOS)), EXAMPLE_SCENARIOS):
+                with column:
+                    # The callback runs before the next script run, which then sends the prompt itself
+                    st.button(
+                        label,
+                        key=f"example_{label}",
+                        use_container_width=True,
+                        on_click=_queue_prompt,
+                        args=(example_prompt,)
+                    )
     
     # Footer
     st.markdown("---")
-    st.markdown(
-        "<div style='text-align: center; color: #666;'>"
-        "Decidr helps you make better decisions through AI-powered conversation. "
-        "Remember, the final decision is always yours! 🎯"
-        "</div>", 
-        unsafe_allow_html=True
-    )
+    st.markdown(_FOOTER_MD, unsafe_allow_html=True)
+    
+    # Poll until the background reply lands
+    if st.session_state.pending_future is not None:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
 
 if __name__ == "__main__":
 